@@ -1,16 +1,27 @@
 #!/usr/bin/env python3
 
 import html
+import json
 import os
 import sys
+import time
+import traceback
 import base64
 import re
 import argparse
 import logging
-from datetime import datetime, timedelta
-import requests
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from functools import lru_cache
 from pathlib import Path
-from dotenv import load_dotenv
+from types import MappingProxyType
+# requests and dotenv are imported where first needed, so --help starts quickly
+
+try:
+    import orjson  # Optional: faster JSON parsing for large page bodies
+except ImportError:
+    orjson = None
 
 # ============================================================================
 # CONFIGURATION
@@ -18,6 +29,8 @@ from dotenv import load_dotenv
 
 def load_config():
     """Load configuration from environment variables"""
+    from dotenv import load_dotenv
+    
     # Find and load .env file
     env_path = Path(__file__).parent.parent / '.env'
     if not env_path.exists():
@@ -36,6 +49,7 @@ def load_config():
             'workspace_id': os.getenv('TOGGL_WORKSPACE_ID'),
             'api_url': 'https://api.track.toggl.com/api/v9',
             'reports_api_url': 'https://api.track.toggl.com/reports/api/v3',
+            'cache_dir': Path(os.getenv('XDG_CACHE_HOME') or Path.home() / '.cache') / 'submit_wars',
         },
         'confluence': {
             'username': os.getenv('CONFLUENCE_USERNAME'),
@@ -58,6 +72,18 @@ def load_config():
 class DateUtils:
     """Centralized date handling utilities"""
     
+    # English month names as used in page headings, independent of locale
+    MONTH_NAMES = ("January", "February", "March", "April", "May", "June", 
+                   "July", "August", "September", "October", "November", "December")
+    
+    # Offset from midnight to the last microsecond of the same day
+    END_OF_DAY = timedelta(days=1, microseconds=-1)
+    
+    @staticmethod
+    def _start_of_day(dt):
+        """Midnight at the start of a datetime's day"""
+        return dt.replace(hour=0, minute=0, second=0, microsecond=0)
+    
     @staticmethod
     def get_last_friday(from_date=None):
         """Get the most recent Friday from a given date"""
@@ -72,13 +98,12 @@ class DateUtils:
     @staticmethod
     def get_last_week_dates():
         """Gets the date range for the last full work week (Monday through Friday)"""
-        last_friday = DateUtils.get_last_friday()
-        last_friday = last_friday.replace(hour=23, minute=59, second=59, microsecond=999999)
+        friday_start = DateUtils._start_of_day(DateUtils.get_last_friday())
         
-        monday_of_last_week = last_friday - timedelta(days=4)
-        monday_of_last_week = monday_of_last_week.replace(hour=0, minute=0, second=0, microsecond=0)
+        monday_of_last_week = friday_start - timedelta(days=4)
+        last_friday = friday_start + DateUtils.END_OF_DAY
         
-        logging.debug(f"Last full work week: {monday_of_last_week.strftime('%Y-%m-%d')} to {last_friday.strftime('%Y-%m-%d')}")
+        logging.debug("Last full work week: %s to %s", monday_of_last_week.date(), last_friday.date())
         
         return {
             'start_date': monday_of_last_week,
@@ -87,41 +112,34 @@ class DateUtils:
     
     @staticmethod
     def get_all_weeks_in_year(year=None):
-        """Gets all weeks in the specified year from January 1st to current date"""
-        weeks = []
-        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        """Gets all weeks in the specified year from January 1st to current date
+        Each week also carries its month name and zero-padded 'dd/mm' end date"""
+        today = datetime.now()
         current_year = year if year is not None else today.year
         
-        # Start from first day of the year
-        current_date = datetime(current_year, 1, 1)
+        # Work with day ordinals and only build datetimes for the output
+        first_day = date(current_year, 1, 1)
         
         # Find the first Friday
-        days_until_friday = (4 - current_date.weekday()) % 7
-        current_date += timedelta(days=days_until_friday)
+        days_until_friday = (4 - first_day.weekday()) % 7
+        first_friday = first_day.toordinal() + days_until_friday
         
         # End date is either end of year (past years) or today
-        if current_year < today.year:
-            # Find the last Friday of December
-            last_day = datetime(current_year, 12, 31)
-            days_to_friday = (last_day.weekday() - 4) % 7  # 4 = Friday
-            end_date = last_day - timedelta(days=days_to_friday)
-        else:
-            # Use today for current year
-            end_date = today
-        
-        # Generate weeks until we reach the end date
-        while current_date <= end_date:
-            week_end = current_date
-            week_start = week_end - timedelta(days=4)
-            
-            weeks.append({
-                'start_date': week_start,
-                'end_date': week_end
-            })
-            
-            current_date += timedelta(days=7)
+        end_ordinal = min(date(current_year, 12, 31).toordinal(), today.toordinal())
+        
+        # One week per Friday up to the end date, with its labels precomputed
+        weeks = [
+            {
+                'start_date': datetime.fromordinal(friday - 4),
+                'end_date': week_end,
+                'month': DateUtils.MONTH_NAMES[week_end.month - 1],
+                'week_end_date': f"{week_end.day:02d}/{week_end.month:02d}"
+            }
+            for friday in range(first_friday, end_ordinal + 1, 7)
+            for week_end in (datetime.fromordinal(friday),)
+        ]
         
-        logging.debug(f"Generated {len(weeks)} weeks for {current_year}")
+        logging.debug("Generated %s weeks for %s", len(weeks), current_year)
         return weeks
     
     @staticmethod
@@ -130,31 +148,25 @@ class DateUtils:
         date = date or DateUtils.get_last_friday()
         
         return {
-            'month': date.strftime('%B'),
-            'week_end_date': date.strftime('%d/%m')
+            'month': DateUtils.MONTH_NAMES[date.month - 1],
+            'week_end_date': f"{date.day:02d}/{date.month:02d}"
         }
 
     @staticmethod
     def get_current_week_dates():
         """Gets the date range for the current work week (Monday through Friday)"""
         today = datetime.now()
+        today_start = DateUtils._start_of_day(today)
         
         # Find Monday of current week
         day_of_week = today.weekday()  # 0=Monday, 1=Tuesday, ..., 6=Sunday
-        days_since_monday = day_of_week
-        monday_of_current_week = today - timedelta(days=days_since_monday)
-        monday_of_current_week = monday_of_current_week.replace(hour=0, minute=0, second=0, microsecond=0)
+        monday_of_current_week = today_start - timedelta(days=day_of_week)
         
         # End date is either today or upcoming Friday if today is before Friday
-        if day_of_week < 4:  # Before Friday
-            days_to_friday = 4 - day_of_week
-            end_date = today + timedelta(days=days_to_friday)
-        else:  # Friday or weekend
-            end_date = today
-            
-        end_date = end_date.replace(hour=23, minute=59, second=59, microsecond=999999)
+        days_to_end = 4 - day_of_week if day_of_week < 4 else 0
+        end_date = today_start + timedelta(days=days_to_end) + DateUtils.END_OF_DAY
         
-        logging.debug(f"Current work week: {monday_of_current_week.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')}")
+        logging.debug("Current work week: %s to %s", monday_of_current_week.date(), end_date.date())
         
         return {
             'start_date': monday_of_current_week,
@@ -165,34 +177,70 @@ class DateUtils:
 # API SERVICE
 # ============================================================================
 
+def parse_json(raw):
+    """Parse a JSON response body, using orjson when it is installed"""
+    return orjson.loads(raw) if orjson else json.loads(raw)
+
+def dump_json(data):
+    """Serialize a request payload to JSON bytes, using orjson when it is installed"""
+    return orjson.dumps(data) if orjson else json.dumps(data).encode()
+
 class ApiService:
     """Base API service with common methods"""
     
+    REQUEST_TIMEOUT = (3.05, 30)  # (connect, read) seconds
+    
     def __init__(self, base_url, api_token):
         self.base_url = base_url
         self.api_token = api_token
+        self.session = self._create_session()
+        self.session.headers.update(self.get_default_headers())
+    
+    @staticmethod
+    def _create_session():
+        """Create a pooled HTTP session that reuses connections between requests"""
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+        
+        # Hand the last response back after retries so callers can report its status
+        retries = Retry(
+            total=3,
+            backoff_factor=0.3,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=frozenset(['GET', 'POST', 'PUT']),
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retries)
+        session = requests.Session()
+        session.mount('https://', adapter)
+        return session
+    
+    def get_default_headers(self):
+        """Headers sent with every request of this service"""
+        return {}
+    
+    def _request(self, method, url, **kwargs):
+        """Send a request through the session with the default timeout applied"""
+        kwargs.setdefault('timeout', self.REQUEST_TIMEOUT)
+        return self.session.request(method, url, **kwargs)
     
     def make_request(self, method, endpoint, data=None, headers=None):
         """Make an HTTP request to the API with error handling"""
         url = f"{self.base_url}{endpoint}"
-        headers = headers or {}
         
-        logging.debug(f"{method} request: {url}")
+        logging.debug("%s request: %s", method, url)
         
         try:
-            if method.upper() == 'GET':
-                response = requests.get(url, headers=headers)
-            elif method.upper() == 'PUT':
-                response = requests.put(url, json=data, headers=headers)
-            elif method.upper() == 'POST':
-                response = requests.post(url, json=data, headers=headers)
-            else:
+            if method.upper() not in ('GET', 'PUT', 'POST'):
                 raise ValueError(f"Unsupported HTTP method: {method}")
-                
+            
+            body = dump_json(data) if data is not None else None
+            response = self._request(method.upper(), url, data=body, headers=headers)
             response.raise_for_status()
-            return response.json()
+            return parse_json(response.content)
         except Exception as e:
-            logging.error(f"Error in {method} request to {url}: {str(e)}")
+            logging.error("Error in %s request to %s: %s", method, url, e)
             raise
     
     def get(self, endpoint, headers=None):
@@ -214,10 +262,20 @@ class ApiService:
 class TogglService(ApiService):
     """Service for interacting with the Toggl API"""
     
-    def __init__(self, api_token, api_url, workspace_id, reports_api_url=None):
+    PROJECT_CACHE_TTL = 24 * 60 * 60  # seconds
+    
+    def __init__(self, api_token, api_url, workspace_id, reports_api_url=None, cache_dir=None):
+        # Encode the auth header once; it is reused for every request
+        auth_token = base64.b64encode(f"{api_token}:api_token".encode()).decode()
+        self._headers = MappingProxyType({
+            'Authorization': f"Basic {auth_token}",
+            'Content-Type': 'application/json'
+        })
         super().__init__(api_url, api_token)
         self.workspace_id = workspace_id
         self.reports_api_url = reports_api_url or api_url
+        self._project_map_cache = None  # Projects don't change within a run
+        self.cache_dir = Path(cache_dir) if cache_dir else None  # None disables the disk cache
         
         # Validate required fields
         if not api_token:
@@ -225,24 +283,26 @@ class TogglService(ApiService):
         if not workspace_id:
             logging.error("Toggl workspace ID is missing")
     
+    def get_default_headers(self):
+        """Authenticate every session request against Toggl"""
+        return self.get_toggl_headers()
+    
     def get_toggl_headers(self):
-        """Create headers for Toggl API authentication"""
-        auth_token = base64.b64encode(f"{self.api_token}:api_token".encode()).decode()
-        return {
-            'Authorization': f"Basic {auth_token}",
-            'Content-Type': 'application/json'
-        }
+        """Headers for Toggl API authentication (read-only, computed at construction)"""
+        return self._headers
     
-    def fetch_time_records(self, start_date, end_date):
-        """Fetch time records from Toggl Reports API"""
+    def fetch_time_records(self, start_date, end_date, grouped=False):
+        """Fetch time records from Toggl Reports API
+        With grouped=True, entries sharing a description and project come back as one
+        record whose 'time_entries' list holds the individual entries"""
 
         if start_date >= end_date:
             logging.debug("Start date is after end date")
             return []
 
         # Format dates for API request
-        start_date_str = start_date.strftime('%Y-%m-%d')
-        end_date_str = end_date.strftime('%Y-%m-%d')
+        start_date_str = start_date.isoformat()[:10]
+        end_date_str = end_date.isoformat()[:10]
 
         # Use reports API
         endpoint = f"/workspace/{self.workspace_id}/search/time_entries"
@@ -252,20 +312,73 @@ class TogglService(ApiService):
                 "start_date": start_date_str,
                 "end_date": end_date_str
             }
+            if grouped:
+                payload["grouped"] = True
             
             url = f"{self.reports_api_url}{endpoint}"
-            headers = self.get_toggl_headers()
+            time_records = []
             
-            response = requests.post(url, json=payload, headers=headers)
-            response.raise_for_status()
-            time_records = response.json()
+            # Results are paginated; follow the next-page headers until exhausted
+            while True:
+                response = self._request('POST', url, data=dump_json(payload))
+                response.raise_for_status()
+                time_records.extend(parse_json(response.content))
+                
+                next_row = response.headers.get('X-Next-Row-Number')
+                if not next_row:
+                    break
+                payload["first_row_number"] = int(next_row)
+                if response.headers.get('X-Next-ID'):
+                    payload["first_id"] = int(response.headers['X-Next-ID'])
             
             return time_records
         except Exception as e:
             raise Exception(f"Failed to fetch time records: {e}")
     
-    def fetch_projects(self):
-        """Fetch projects from Toggl API"""
+    def fetch_all_weeks(self, weeks):
+        """Fetch time records for several weeks with a single date-range request
+        Returns a list of records per week, in the same order as weeks.
+        If the request fails, every week gets the exception instead"""
+        if not weeks:
+            return []
+        
+        start_date = min(week['start_date'] for week in weeks)
+        end_date = max(week['end_date'] for week in weeks)
+        
+        try:
+            time_records = self.fetch_time_records(start_date, end_date, grouped=True)
+        except Exception as e:
+            return [e] * len(weeks)
+        
+        # Map every day ordinal covered by a week to that week's position
+        week_positions = {}
+        for i, week in enumerate(weeks):
+            for day_ordinal in range(week['start_date'].toordinal(), week['end_date'].toordinal() + 1):
+                week_positions[day_ordinal] = i
+        
+        # Add each record to every week in which one of its entries started
+        results = [[] for _ in weeks]
+        for record in time_records:
+            record_weeks = set()
+            for entry in record.get('time_entries') or []:
+                position = week_positions.get(date.fromisoformat(entry['start'][:10]).toordinal())
+                if position is not None:
+                    record_weeks.add(position)
+            for position in record_weeks:
+                results[position].append(record)
+        
+        return results
+    
+    def fetch_projects(self, force_refresh=False, project_ids=()):
+        """Fetch projects from Toggl API, cached for the rest of the run and on disk
+        The cache is refreshed if it lacks any of project_ids, e.g. a project created since"""
+        if not force_refresh:
+            if self._project_map_cache is None:
+                self._project_map_cache = self._load_cached_projects()
+            if self._project_map_cache is not None and all(
+                    project_id in self._project_map_cache for project_id in project_ids):
+                return self._project_map_cache
+        
         if not self.workspace_id:
             logging.error("Cannot fetch projects: Workspace ID is missing")
             return {}
@@ -273,42 +386,117 @@ class TogglService(ApiService):
         endpoint = f"/workspaces/{self.workspace_id}/projects"
         
         try:
-            projects = self.get(endpoint, self.get_toggl_headers())
+            projects = self.get(endpoint)
             project_map = {project['id']: project['name'] for project in projects}
-            logging.debug(f"Retrieved {len(projects)} projects from Toggl")
+            logging.debug("Retrieved %s projects from Toggl", len(projects))
+            self._project_map_cache = project_map
+            self._save_cached_projects(project_map)
             return project_map
         except Exception as e:
-            logging.error(f"Error fetching projects: {str(e)}")
+            logging.error("Error fetching projects: %s", e)
             raise
+    
+    def _projects_cache_path(self):
+        """Path of the project map cache file for this workspace"""
+        return self.cache_dir / f"projects_{self.workspace_id}.json"
+    
+    def _load_cached_projects(self):
+        """Read the project map from the disk cache, or None if missing or stale"""
+        if not self.cache_dir:
+            return None
+        
+        path = self._projects_cache_path()
+        try:
+            if time.time() - path.stat().st_mtime > self.PROJECT_CACHE_TTL:
+                return None
+            # JSON object keys are strings, project ids are integers
+            project_map = {int(project_id): name for project_id, name in parse_json(path.read_bytes()).items()}
+        except (OSError, ValueError, AttributeError) as e:
+            logging.debug("Project cache not used: %s", e)
+            return None
+        
+        logging.debug("Loaded %s projects from %s", len(project_map), path)
+        return project_map
+    
+    def _save_cached_projects(self, project_map):
+        """Write the project map to the disk cache; failures only cost a refetch next run"""
+        if not self.cache_dir:
+            return
+        
+        path = self._projects_cache_path()
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write to a temporary file and rename it, so readers never see a partial file
+            tmp_path = path.with_suffix('.tmp')
+            tmp_path.write_bytes(dump_json({str(project_id): name for project_id, name in project_map.items()}))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logging.debug("Could not write project cache: %s", e)
 
 # ============================================================================
 # CONFLUENCE SERVICE
 # ============================================================================
 
+# Week headings in either date format, e.g. w/e 01/05 or w/e 1/5
+_WEEK_HEADING_RE = re.compile(r'<h2>w/e (\d{1,2})/(\d{1,2})</h2>')
+# Week headings with a single-digit day or month, e.g. w/e 1/05 or w/e 14/7
+_UNPADDED_WEEK_HEADING_RE = re.compile(r'<h2>w/e (?:\d/\d\d?|\d\d/\d)</h2>')
+
 class ConfluenceService(ApiService):
     """Service for interacting with the Confluence API"""
     
-    MONTH_NAMES = ["January", "February", "March", "April", "May", "June", 
-                   "July", "August", "September", "October", "November", "December"]
+    MONTH_NAMES = DateUtils.MONTH_NAMES
+    MONTH_NAMES_SET = frozenset(MONTH_NAMES)
+    MONTH_INDEX = {name: i for i, name in enumerate(MONTH_NAMES)}
+    
+    # Page markup for new sections; each level nests the one below it
+    USER_SECTION_TEMPLATE = "\n<h3>{name}</h3>\n{content}"
+    WEEK_SECTION_TEMPLATE = "\n<h2>w/e {week_end_date}</h2>" + USER_SECTION_TEMPLATE + "\n"
+    MONTH_SECTION_TEMPLATE = "\n<h1>{month}</h1>" + WEEK_SECTION_TEMPLATE
     
     def __init__(self, base_url, api_token, page_id, username, display_name=None):
+        # Encode the auth header once; it is reused for every request
+        auth_token = base64.b64encode(f"{username}:{api_token}".encode()).decode('ascii')
+        self._headers = MappingProxyType({
+            'Authorization': f"Basic {auth_token}",
+            'Content-Type': 'application/json'
+        })
         super().__init__(base_url, api_token)
         self.page_id = page_id
         self.username = username
         self.display_name = display_name or username or 'Andres'
         self.date_format = None  # Will store the detected date format
-        # Precompile regex patterns for better performance
-        self._month_pattern = re.compile(r'<h1>([A-Za-z]+)</h1>([\s\S]*?)(?=<h1>|$)')
-        self._unpadded_date_pattern = re.compile(r'<h2>w/e (\d{1}/\d{1,2}|\d{1,2}/\d{1})</h2>')
+        self._page_cache = None  # Page data from the last fetch or save
+    
+    @property
+    def heading_name(self):
+        """Display name as it appears in the page's HTML headings"""
+        return html.escape(self.display_name, quote=False)
+    
+    @staticmethod
+    @lru_cache(maxsize=64)
+    def _week_pattern(day_num, month_num):
+        """Compiled pattern matching a week heading in either date format and its section"""
+        padded_date = f"{day_num:02d}/{month_num:02d}"
+        unpadded_date = f"{day_num}/{month_num}"
+        date_options = padded_date if padded_date == unpadded_date else f"{padded_date}|{unpadded_date}"
+        # The body runs up to the next week heading; [^<]* skips text without backtracking
+        return re.compile(f'<h2>w/e (?P<date>{date_options})</h2>(?P<body>[^<]*(?:<(?!h2>)[^<]*)*)')
+    
+    @staticmethod
+    @lru_cache(maxsize=64)
+    def _user_pattern(display_name):
+        """Compiled pattern matching a user heading and its section"""
+        # The section runs up to the next user or week heading
+        return re.compile(f'<h3>{re.escape(display_name)}</h3>([^<]*(?:<(?!h[23]>)[^<]*)*)')
+    
+    def get_default_headers(self):
+        """Authenticate every session request against Confluence"""
+        return self.get_confluence_headers()
     
     def get_confluence_headers(self):
-        """Create headers for Confluence API authentication"""
-        auth_str = f"{self.username}:{self.api_token}"
-        auth_token = base64.b64encode(auth_str.encode()).decode('ascii')
-        return {
-            'Authorization': f"Basic {auth_token}",
-            'Content-Type': 'application/json'
-        }
+        """Headers for Confluence API authentication (read-only, computed at construction)"""
+        return self._headers
     
     def get_existing_content(self):
         """Retrieves the existing page content for analysis"""
@@ -318,10 +506,23 @@ class ConfluenceService(ApiService):
             self._detect_date_format(page_data['content'])
         return page_data['content']
     
+    def get_page_state(self):
+        """Read and parse the page once for a batch update
+        Returns the page data plus its month sections and the set of weeks
+        the user already reported"""
+        page_data = self.get_page_content()
+        if not self.date_format:
+            self._detect_date_format(page_data['content'])
+        
+        return {
+            **page_data,
+            'month_sections': self.extract_month_sections(page_data['content']),
+            'existing_weeks': self.extract_existing_week_dates(page_data['content'])
+        }
+    
     def _detect_date_format(self, content):
         """Detect if page uses zero-padded dates or not"""
-        # Use the precompiled pattern
-        if self._unpadded_date_pattern.search(content):
+        if _UNPADDED_WEEK_HEADING_RE.search(content):
             self.date_format = "unpadded"
             logging.debug("Detected unpadded date format (e.g. w/e 1/5)")
         else:
@@ -329,46 +530,56 @@ class ConfluenceService(ApiService):
             self.date_format = "padded"
             logging.debug("Using padded date format (e.g. w/e 01/05)")
     
-    def _check_content_exists(self, content, week_end_date):
-        """Check if week and user exist in content
-        Returns a tuple of (week_exists, user_exists)"""
-        # Look for the week heading - try both formats if needed
+    @staticmethod
+    def _parse_week_end_date(week_end_date):
+        """Parse a 'dd/mm' or 'd/m' week end date into (day, month) integers"""
         day, month = week_end_date.split('/')
-        day_num = int(day)
-        month_num = int(month)
-        
-        # Generate both formats for comparison
-        padded_date = f"{day_num:02d}/{month_num:02d}"
-        unpadded_date = f"{day_num}/{month_num}"
-        
-        # Try the specific format we've detected first
-        search_date = padded_date if self.date_format == "padded" else unpadded_date
-        
-        week_pattern = re.compile(f'<h2>w/e {search_date}</h2>(.*?)(?=<h2>|$)', re.DOTALL)
-        week_match = week_pattern.search(content)
-        
-        # If not found, try the other format
-        if not week_match:
-            alt_date = unpadded_date if self.date_format == "padded" else padded_date
-            alt_pattern = re.compile(f'<h2>w/e {alt_date}</h2>(.*?)(?=<h2>|$)', re.DOTALL)
-            week_match = alt_pattern.search(content)
+        return int(day), int(month)
+    
+    def _check_content_exists(self, content, day_num, month_num):
+        """Find the week and user sections in content
+        Returns a tuple of (week_match, user_match), either of which may be None.
+        Match offsets refer to content, so callers can splice without searching again"""
+        # Look for the week heading in both formats with a single search
+        week_match = self._week_pattern(day_num, month_num).search(content)
         
         if not week_match:
-            return False, False
+            return None, None
         
-        # Get the content of this week section
-        week_section = week_match.group(0)
-        
-        # Check if user heading exists in the week section
-        user_pattern = re.compile(f'<h3>{self.display_name}</h3>', re.DOTALL)
-        user_exists = bool(user_pattern.search(week_section))
+        # Check if user heading exists within the week section
+        user_match = self._user_pattern(self.heading_name).search(
+            content, week_match.start(), week_match.end()
+        )
         
-        return True, user_exists
+        return week_match, user_match
+    
+    @staticmethod
+    @lru_cache(maxsize=64)
+    def _heading_pattern(display_name):
+        """Compiled pattern matching week headings, other top-level headings and a user's headings"""
+        return re.compile(rf'<h2>w/e (\d{{1,2}})/(\d{{1,2}})</h2>|<h[12]>|(<h3>{re.escape(display_name)}</h3>)')
+    
+    def extract_existing_week_dates(self, content):
+        """Collect the weeks that already have content for the current user in one pass
+        Returns a set of zero-padded 'dd/mm' week end dates, whatever the page format"""
+        existing_weeks = set()
+        current_week = None
+        
+        for match in self._heading_pattern(self.heading_name).finditer(content):
+            if match.group(1):
+                current_week = f"{int(match.group(1)):02d}/{int(match.group(2)):02d}"
+            elif not match.group(3):
+                # Any other <h1> or <h2> heading closes the week section
+                current_week = None
+            elif current_week:
+                existing_weeks.add(current_week)
+        
+        return existing_weeks
     
     def has_week_for_user(self, content, week_end_date):
         """Checks if a specific week already has content for the current user"""
-        _, user_exists = self._check_content_exists(content, week_end_date)
-        return user_exists
+        _, user_match = self._check_content_exists(content, *self._parse_week_end_date(week_end_date))
+        return user_match is not None
     
     def post_report(self, formatted_content, date_range=None, replace=False):
         """Post a report to Confluence"""
@@ -392,24 +603,74 @@ class ConfluenceService(ApiService):
         
         logging.info(status)
     
+    def apply_weeks_batch(self, current_content, reports, replace=False, month_sections=None):
+        """Apply several weekly reports to page content without saving it
+        The page is split into month sections once (or month_sections is used if
+        already extracted), all reports are added, and the content is reassembled once"""
+        if month_sections is None:
+            month_sections = self.extract_month_sections(current_content)
+        original_sections = month_sections
+        for report in reports:
+            month_sections = self.add_content_to_sections(
+                month_sections,
+                report['month'],
+                report['week_end_date'],
+                report['content'],
+                replace
+            )
+        
+        # Skip rebuilding the page if every report was already there
+        if month_sections is original_sections:
+            return current_content
+        
+        # Generate the final content with proper month ordering
+        return self.regenerate_ordered_content(month_sections)
+    
+    def post_reports_batch(self, reports, replace=False, page_data=None):
+        """Post several weekly reports to Confluence with a single page update
+        Each report is a dict with 'month', 'week_end_date' and 'content' keys.
+        page_data is the page as already read by the caller; its version is used for the save.
+        Returns True if the page was saved"""
+        current_page_data = page_data or self.get_page_content()
+        current_content = current_page_data['content']
+        final_content = self.apply_weeks_batch(
+            current_content, reports, replace, current_page_data.get('month_sections')
+        )
+        
+        if final_content == current_content:
+            return False
+        
+        self.save_page(current_page_data['title'], final_content, current_page_data['version'])
+        return True
+    
     def get_page_content(self):
-        """Get the content of a Confluence page"""
+        """Get the content of a Confluence page, cached for the rest of the run"""
+        if self._page_cache is not None:
+            return self._page_cache
+        
         endpoint = f"/rest/api/content/{self.page_id}?expand=body.storage,version"
         
         try:
-            response = self.get(endpoint, self.get_confluence_headers())
+            response = self.get(endpoint)
             
-            return {
+            self._page_cache = {
                 'content': response['body']['storage']['value'],
                 'title': response['title'],
                 'version': response['version']['number']
             }
+            return self._page_cache
         except Exception as e:
-            logging.error(f"Error fetching page content: {str(e)}")
+            logging.error("Error fetching page content: %s", e)
             raise
     
+    def invalidate_page_cache(self):
+        """Force the next get_page_content call to fetch the page again"""
+        self._page_cache = None
+    
     def save_page(self, title, content, current_version):
         """Save content to a Confluence page"""
+        import requests
+        
         endpoint = f"/rest/api/content/{self.page_id}"
         
         try:
@@ -425,19 +686,18 @@ class ConfluenceService(ApiService):
                 }
             }
             
-            logging.debug(f"Updating page with new version: {current_version + 1}")
+            logging.debug("Updating page with new version: %s", current_version + 1)
             
-            # Use requests directly for better error handling
+            # Use the session directly for better error handling
             url = f"{self.base_url}{endpoint}"
-            headers = self.get_confluence_headers()
             
-            response = requests.put(url, json=payload, headers=headers)
+            response = self._request('PUT', url, data=dump_json(payload))
             
             # Detailed error handling
             if response.status_code != 200:
                 error_msg = f"Error updating Confluence page: {response.status_code} response"
                 try:
-                    error_details = response.json()
+                    error_details = parse_json(response.content)
                     if 'message' in error_details:
                         error_msg += f"\nDetails: {error_details['message']}"
                 except:
@@ -447,7 +707,15 @@ class ConfluenceService(ApiService):
                 raise Exception(error_msg)
                 
             logging.debug("Confluence page updated successfully")
-            return response.json()
+            result = parse_json(response.content)
+            
+            # Keep the cache in step with what was just written
+            self._page_cache = {
+                'content': content,
+                'title': title,
+                'version': result.get('version', {}).get('number', current_version + 1)
+            }
+            return result
         except requests.exceptions.RequestException as e:
             error_msg = f"Network error updating Confluence page: {str(e)}"
             logging.error(error_msg)
@@ -462,17 +730,24 @@ class ConfluenceService(ApiService):
         month = week_info['month']
         week_end_date = week_info['week_end_date']
         
-        # Check if user already has content for this week and get week existence info
-        week_exists, user_exists = self._check_content_exists(current_content, week_end_date)
+        # Parse the date once for all lookups below
+        day_month = self._parse_week_end_date(week_end_date)
+        
+        # Look for the week and user in the month section they would be added to
+        month_sections = self.extract_month_sections(current_content)
+        matches = (None, None)
+        if month in month_sections:
+            matches = self._check_content_exists(month_sections[month], *day_month)
+        week_exists = matches[0] is not None
+        user_exists = matches[1] is not None
         
         # If user content exists and we're not replacing, return early
         if user_exists and not replace:
             return current_content, f"Report already exists for week ending {week_end_date}."
         
-        # Extract all month sections and update
-        month_sections = self.extract_month_sections(current_content)
+        # Update the month section, reusing the matches found above
         updated_sections = self.add_content_to_sections(
-            month_sections, month, week_end_date, formatted_content, replace
+            month_sections, month, week_end_date, formatted_content, replace, day_month, matches
         )
         
         # Generate ordered content
@@ -501,137 +776,100 @@ class ConfluenceService(ApiService):
         """Extracts all month sections from the content"""
         month_sections = {}
         
-        for match in self._month_pattern.finditer(content):
-            month_name = match.group(1)
-            if month_name in self.MONTH_NAMES:
-                month_sections[month_name] = match.group(0)
-                logging.debug(f"Found existing month section: {month_name}")
+        # Each section runs from its <h1> heading up to the next one
+        start = content.find('<h1>')
+        while start != -1:
+            end = content.find('<h1>', start + 4)
+            name_end = content.find('</h1>', start + 4)
+            month_name = content[start + 4:name_end] if name_end != -1 else ''
+            
+            if month_name in self.MONTH_NAMES_SET:
+                month_sections[month_name] = content[start:end] if end != -1 else content[start:]
+                logging.debug("Found existing month section: %s", month_name)
+            
+            start = end
         
         return month_sections
     
-    def add_content_to_sections(self, sections, month, week_end_date, formatted_content, replace=False):
-        """Add new content to the appropriate section"""
-        updated_sections = sections.copy()
-        
-        if month in updated_sections:
-            month_content = updated_sections[month]
-            week_exists, user_exists = self._check_content_exists(month_content, week_end_date)
+    def add_content_to_sections(self, sections, month, week_end_date, formatted_content, replace=False,
+                                day_month=None, matches=None):
+        """Add new content to the appropriate section
+        day_month is the already parsed (day, month) of week_end_date, and matches the
+        (week_match, user_match) already found in sections[month], if available.
+        Returns sections itself if the user's content is already there and not replaced"""
+        if month in sections:
+            month_content = sections[month]
+            day_month = day_month or self._parse_week_end_date(week_end_date)
+            week_match, user_match = matches or self._check_content_exists(month_content, *day_month)
+            if user_match and not replace:
+                return sections
             
-            if user_exists and replace:
+            updated_sections = sections.copy()
+            if user_match:
                 updated_sections[month] = self._replace_user_content(
-                    month_content, week_end_date, formatted_content
+                    month_content, user_match, formatted_content
                 )
-            elif user_exists:
-                return updated_sections
-            elif week_exists:
+            elif week_match:
                 updated_sections[month] = self._add_to_existing_week(
-                    month_content, week_end_date, formatted_content
+                    month_content, week_match, formatted_content
                 )
             else:
                 updated_sections[month] = self._add_new_week(
-                    month_content, week_end_date, formatted_content
+                    month_content, week_end_date, formatted_content, day_month
                 )
         else:
             # Create new month section
-            new_section = f"""
-<h1>{month}</h1>
-<h2>w/e {week_end_date}</h2>
-<h3>{self.display_name}</h3>
-{formatted_content}
-"""
-            updated_sections[month] = new_section
+            updated_sections = sections.copy()
+            updated_sections[month] = self.MONTH_SECTION_TEMPLATE.format(
+                month=month, week_end_date=week_end_date, name=self.heading_name, content=formatted_content
+            )
         
         return updated_sections
     
-    def _replace_user_content(self, content, week_end_date, formatted_content):
-        """Replace existing content for a user in a specific week"""
-        # Find the week section
-        week_pattern = re.compile(f'<h2>w/e {week_end_date}</h2>(.*?)(?=<h2>|$)', re.DOTALL)
-        week_match = week_pattern.search(content)
-        
-        if not week_match:
-            return content
-        
-        # Get the week content
-        week_content = week_match.group(0)
-        
-        # Find the user section in this week
-        user_pattern = re.compile(f'<h3>{self.display_name}</h3>(.*?)(?=<h3>|<h2>|$)', re.DOTALL)
-        user_match = user_pattern.search(week_content)
-        
-        if not user_match:
-            return content
-        
-        # Replace the user's content
-        user_section_start = user_match.start() + len(f'<h3>{self.display_name}</h3>')
-        user_section_end = user_match.end()
-        
-        replaced_week_content = (
-            week_content[:user_section_start] + 
-            "\n" + formatted_content + 
-            week_content[user_section_end:]
-        )
-        
-        # Replace the entire week section in the content
-        return content.replace(week_content, replaced_week_content)
+    def _replace_user_content(self, content, user_match, formatted_content):
+        """Replace existing content for a user in a specific week
+        user_match is the user section match from _check_content_exists"""
+        # Splice the new content in place of the user's existing content
+        return "".join((
+            content[:user_match.start(1)],
+            "\n", formatted_content,
+            content[user_match.end():]
+        ))
     
-    def _add_to_existing_week(self, content, week_end_date, formatted_content):
-        """Add user section to existing week"""
-        # Find the week section
-        week_pattern = re.compile(f'<h2>w/e {week_end_date}</h2>(.*?)(?=<h2>|$)', re.DOTALL)
-        match = week_pattern.search(content)
-        
-        if not match:
-            return content
-        
-        # Build user section
-        user_section = f"<h3>{self.display_name}</h3>\n{formatted_content}"
-        
-        # Insert after week heading
-        week_start = match.start() + len(f'<h2>w/e {week_end_date}</h2>')
-        return content[:week_start] + "\n" + user_section + content[week_start:]
+    def _add_to_existing_week(self, content, week_match, formatted_content):
+        """Add user section to existing week
+        week_match is the week section match from _check_content_exists"""
+        # Insert user section right after week heading
+        week_start = week_match.start('body')
+        user_section = self.USER_SECTION_TEMPLATE.format(name=self.heading_name, content=formatted_content)
+        return "".join((content[:week_start], user_section, content[week_start:]))
     
-    def _add_new_week(self, content, week_end_date, formatted_content):
+    def _add_new_week(self, content, week_end_date, formatted_content, day_month):
         """Add new week to existing month content"""
-        # Parse date to compare chronologically
-        day, month_num = map(int, week_end_date.split('/'))
-        new_week_date = datetime.now().replace(day=day, month=month_num)
-        
-        # Extract all existing week headings with their positions
-        week_pattern = re.compile(r'<h2>w\/e (\d{2})\/(\d{2})<\/h2>')
-        weeks = []
-        
-        for match in week_pattern.finditer(content):
-            try:
-                w_day, w_month = map(int, [match.group(1), match.group(2)])
-                week_date = datetime.now().replace(day=w_day, month=w_month)
-                weeks.append({'date': week_date, 'pos': match.start()})
-            except Exception:
-                continue
+        # Use a (month, day) key to compare chronologically
+        day, month_num = day_month
+        new_week_key = (month_num, day)
         
-        # Find insert position (reverse chronological order - newest first)
+        # Find insert position (reverse chronological order - newest first):
+        # before the most recent existing week that is older than the new one
         insert_pos = content.find('</h1>') + 5  # Default: after the month heading
+        best_key = None
         
-        for week in sorted(weeks, key=lambda w: w['date'], reverse=True):
-            if week['date'] < new_week_date:
-                insert_pos = week['pos']
-                break
-        
-        # Create week section
-        week_section = f"""
-<h2>w/e {week_end_date}</h2>
-<h3>{self.display_name}</h3>
-{formatted_content}
-"""
+        for match in _WEEK_HEADING_RE.finditer(content):
+            week_key = (int(match.group(2)), int(match.group(1)))
+            if week_key < new_week_key and (best_key is None or week_key > best_key):
+                best_key = week_key
+                insert_pos = match.start()
         
+        week_section = self.WEEK_SECTION_TEMPLATE.format(
+            week_end_date=week_end_date, name=self.heading_name, content=formatted_content
+        )
         return content[:insert_pos] + week_section + content[insert_pos:]
     
     def regenerate_ordered_content(self, sections):
         """Regenerate content with months in reverse chronological order"""
         # Sort months (newest first)
-        months = sorted(sections.keys(), 
-                       key=lambda m: self.MONTH_NAMES.index(m) if m in self.MONTH_NAMES else -1, 
-                       reverse=True)
+        months = sorted(sections, key=lambda m: self.MONTH_INDEX.get(m, -1), reverse=True)
         
         return "".join(sections[month] for month in months)
     
@@ -641,12 +879,12 @@ class ConfluenceService(ApiService):
         
         # Format date according to detected pattern (or default to padded)
         if self.date_format == "unpadded":
-            week_end_date = date.strftime('%-d/%-m')  # No leading zeros
+            week_end_date = f"{date.day}/{date.month}"            # No leading zeros
         else:
-            week_end_date = date.strftime('%d/%m')    # With leading zeros
+            week_end_date = f"{date.day:02d}/{date.month:02d}"    # With leading zeros
         
         return {
-            'month': date.strftime('%B'),
+            'month': self.MONTH_NAMES[date.month - 1],
             'week_end_date': week_end_date
         }
 
@@ -659,32 +897,26 @@ def format_time_records(time_records, project_map):
     if not time_records:
         return "No time records found for the last week."
     
-    # Group time entries by project and task
-    project_groups = {}
+    # Group unique task descriptions by project
+    project_groups = defaultdict(set)
     for record in time_records:
-        project_id = record.get('project_id')
-        project_name = project_map.get(project_id, 'Other') if project_id else 'Other'
-        
-        if project_name not in project_groups:
-            project_groups[project_name] = set()
+        tasks = project_groups[project_map.get(record.get('project_id')) or 'Other']
         
-        description = record.get('description', '').strip()
+        description = (record.get('description') or '').strip()
         if description:
-            # Escape HTML special characters to prevent parsing errors
-            escaped_description = html.escape(description)
-            project_groups[project_name].add(escaped_description)
+            tasks.add(description)
     
     # Format as HTML list
     html_output = ['<ul>']
-    for project_name in sorted(project_groups.keys()):
-        escaped_project = html.escape(project_name)
-        html_output.append(f"<li>{escaped_project}")
+    for project_name in sorted(project_groups):
+        html_output.append(f"<li>{html.escape(project_name)}")
         
-        tasks = sorted(project_groups[project_name])
+        tasks = project_groups[project_name]
         if tasks:
+            # Escape HTML special characters to prevent parsing errors
+            escaped_tasks = sorted(html.escape(task) for task in tasks)
             html_output.append('<ul>')
-            for task in tasks:
-                html_output.append(f"<li>{task}</li>")
+            html_output.extend(f"<li>{task}</li>" for task in escaped_tasks)
             html_output.append('</ul>')
         
         html_output.append('</li>')
@@ -696,37 +928,44 @@ def format_time_records(time_records, project_map):
 # MAIN APPLICATION LOGIC
 # ============================================================================
 
+# (config section, config key, environment variable) for each required setting
+REQUIRED_VARS = (
+    ('toggl', 'api_token', 'TOGGL_API_TOKEN'),
+    ('toggl', 'workspace_id', 'TOGGL_WORKSPACE_ID'),
+    ('confluence', 'username', 'CONFLUENCE_USERNAME'),
+    ('confluence', 'api_token', 'CONFLUENCE_API_TOKEN'),
+    ('confluence', 'base_url', 'CONFLUENCE_BASE_URL'),
+)
+
+def get_project_ids(time_records):
+    """Set of project ids referenced by time records"""
+    return {record['project_id'] for record in time_records if record.get('project_id')}
+
 def validate_env_vars(config):
     """Validate required environment variables"""
-    required_vars = [
-        {'value': config['toggl']['api_token'], 'name': 'TOGGL_API_TOKEN'},
-        {'value': config['toggl']['workspace_id'], 'name': 'TOGGL_WORKSPACE_ID'},
-        {'value': config['confluence']['username'], 'name': 'CONFLUENCE_USERNAME'},
-        {'value': config['confluence']['api_token'], 'name': 'CONFLUENCE_API_TOKEN'},
-        {'value': config['confluence']['base_url'], 'name': 'CONFLUENCE_BASE_URL'}
+    missing_vars = [
+        var_name for section, key, var_name in REQUIRED_VARS
+        if not config[section].get(key)
     ]
     
-    missing_vars = [var['name'] for var in required_vars if not var['value']]
-    
     if missing_vars:
         for var_name in missing_vars:
-            logging.error(f"ERROR: {var_name} is not set in environment variables")
+            logging.error("ERROR: %s is not set in environment variables", var_name)
         sys.exit(1)
 
-def process_week(toggl_service, confluence_service, date_range, existing_project_map=None, replace=False):
+def process_week(toggl_service, confluence_service, date_range, replace=False):
     """Process a single week and post to Confluence"""
-    week_date_str = date_range['end_date'].strftime('%d/%m')
-    logging.debug(f"Fetching time records for week ending {week_date_str}...")
-    
-    # Get project map once if not provided
-    project_map = existing_project_map or toggl_service.fetch_projects()
+    logging.debug("Fetching time records for week ending %s...", date_range['end_date'].date())
     
     time_records = toggl_service.fetch_time_records(date_range['start_date'], date_range['end_date'])
-    logging.info(f"Retrieved {len(time_records)} time entries")
+    logging.info("Retrieved %s time entries", len(time_records))
     
     if not time_records:
         raise Exception("No time records found for this period")
     
+    # Project map is cached by the service; it is refreshed if a project is missing
+    project_map = toggl_service.fetch_projects(project_ids=get_project_ids(time_records))
+    
     formatted_report = format_time_records(time_records, project_map)
     confluence_service.post_report(formatted_report, date_range, replace)
 
@@ -734,99 +973,98 @@ def fill_in_missing_weeks(toggl_service, confluence_service, year=None, replace=
     """Fill in reports for all weeks in the specified year in a single update"""
     all_weeks = DateUtils.get_all_weeks_in_year(year)
     year_str = year or datetime.now().year
-    logging.info(f"Found {len(all_weeks)} weeks in {year_str} to process.")
+    logging.info("Found %s weeks in %s to process.", len(all_weeks), year_str)
     
-    # Check which weeks already have reports
-    existing_content = confluence_service.get_existing_content()
-    
-    # Fetch project map once
-    project_map = toggl_service.fetch_projects()
+    # Read the page once: it tells us which weeks exist and is the base for the update
+    page_state = confluence_service.get_page_state()
+    existing_weeks = page_state['existing_weeks']
     
     stats = {'processed': 0, 'skipped': 0, 'errors': 0, 'no_data': 0, 'replaced': 0}
     weeks_to_process = []
-
-    # Process newest weeks first
-    reversed_weeks = list(reversed(all_weeks))
+    weeks_to_fetch = []
     
-    # First pass: collect all weeks that need processing
-    for i, week in enumerate(reversed_weeks):
-        # Use Confluence's format detection for week end date
-        week_info = confluence_service.get_week_info_from_date(week['end_date'])
-        week_end_date_str = week_info['week_end_date']
+    # First pass: collect all weeks that need processing, newest first
+    for i, week in enumerate(reversed(all_weeks)):
+        week_end_date_str = week['week_end_date']
         
         week_index = len(all_weeks) - i
-        logging.info(f"[{week_index}/{len(all_weeks)}] Week ending {week_end_date_str}")
+        logging.info("[%s/%s] Week ending %s", week_index, len(all_weeks), week_end_date_str)
         
         # Check if the week already exists
-        week_exists = confluence_service.has_week_for_user(existing_content, week_end_date_str)
+        week_exists = week_end_date_str in existing_weeks
         if week_exists and not replace:
-            logging.info(f"✓ Report already exists for week ending {week_end_date_str}. Skipping.")
+            logging.info("✓ Report already exists for week ending %s. Skipping.", week_end_date_str)
             stats['skipped'] += 1
             continue
         elif week_exists and replace:
-            logging.info(f"⟳ Report exists for week ending {week_end_date_str}. Will replace.")
+            logging.info("⟳ Report exists for week ending %s. Will replace.", week_end_date_str)
             stats['replaced'] += 1
         
+        # Headings use the page's own date format
+        week_info = confluence_service.get_week_info_from_date(week['end_date'])
+        weeks_to_fetch.append({'week': week, 'week_info': week_info, 'week_exists': week_exists})
+    
+    # Only talk to Toggl if some week still needs a report
+    results = []
+    project_map = {}
+    if weeks_to_fetch:
+        logging.info("Fetching time records for %s weeks...", len(weeks_to_fetch))
+        
+        # Fetch the project map in the background while the time entries download
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            projects_future = executor.submit(toggl_service.fetch_projects)
+            results = toggl_service.fetch_all_weeks([item['week'] for item in weeks_to_fetch])
+            project_map = projects_future.result()
+        
+        # A cached project map may predate projects used in these weeks
+        project_ids = get_project_ids(
+            record for time_records in results if not isinstance(time_records, Exception)
+            for record in time_records
+        )
+        if not project_ids.issubset(project_map):
+            project_map = toggl_service.fetch_projects(project_ids=project_ids)
+    
+    # Second pass: format the fetched records
+    for item, time_records in zip(weeks_to_fetch, results):
+        week_info = item['week_info']
+        week_end_date_str = week_info['week_end_date']
+        
         try:
-            # Fetch time records and format the report
-            time_records = toggl_service.fetch_time_records(week['start_date'], week['end_date'])
+            if isinstance(time_records, Exception):
+                raise time_records
+            
             if not time_records:
-                logging.info(f"ℹ No time entries found for this week. Skipping.")
+                logging.info("ℹ No time entries found for week ending %s. Skipping.", week_end_date_str)
                 stats['no_data'] += 1
                 continue
             else:
                 formatted_report = format_time_records(time_records, project_map)
-                if not week_exists:
+                if not item['week_exists']:
                     stats['processed'] += 1
             
             # Store this week for batch processing
             weeks_to_process.append({
-                'month': week_info['month'],
+                'month': item['week']['month'],
                 'week_end_date': week_end_date_str,
                 'content': formatted_report
             })
             
         except Exception as e:
-            logging.error(f"✗ Error processing week: {str(e)}")
+            logging.error("✗ Error processing week ending %s: %s", week_end_date_str, e)
             stats['errors'] += 1
     
     # If we have weeks to process, update the page in a single batch
     if weeks_to_process:
         try:
-            # Get current page content
-            current_page_data = confluence_service.get_page_content()
-            current_content = current_page_data['content']
-            
-            # Extract all month sections from current content
-            month_sections = confluence_service.extract_month_sections(current_content)
-            
-            # Add all collected weeks to the appropriate sections
-            for week in weeks_to_process:
-                month_sections = confluence_service.add_content_to_sections(
-                    month_sections, 
-                    week['month'],
-                    week['week_end_date'],
-                    week['content'],
-                    replace
-                )
-            
-            # Generate the final content with proper month ordering
-            final_content = confluence_service.regenerate_ordered_content(month_sections)
-            
             # Update the page with all changes at once
-            if final_content != current_content:
-                confluence_service.save_page(
-                    current_page_data['title'],
-                    final_content,
-                    current_page_data['version']
-                )
+            if confluence_service.post_reports_batch(weeks_to_process, replace, page_state):
                 processed_count = stats['processed'] + stats['replaced']
-                logging.info(f"Successfully updated {processed_count} weeks in a single batch.")
+                logging.info("Successfully updated %s weeks in a single batch.", processed_count)
             else:
                 logging.info("No changes needed to the page content.")
                 
         except Exception as e:
-            logging.error(f"✗ Error updating Confluence in batch: {str(e)}")
+            logging.error("✗ Error updating Confluence in batch: %s", e)
             stats['errors'] += 1
     else:
         logging.info("No content to update. All weeks already exist or have no data.")
@@ -836,13 +1074,13 @@ def fill_in_missing_weeks(toggl_service, confluence_service, year=None, replace=
 def print_summary(stats, total_weeks):
     """Print a summary of the processing results"""
     logging.info("\n===== Summary =====")
-    logging.info(f"Total weeks found: {total_weeks}")
-    logging.info(f"Weeks successfully processed: {stats['processed']}")
+    logging.info("Total weeks found: %s", total_weeks)
+    logging.info("Weeks successfully processed: %s", stats['processed'])
     if 'replaced' in stats and stats['replaced'] > 0:
-        logging.info(f"Weeks with replaced content: {stats['replaced']}")
-    logging.info(f"Weeks skipped (already existed): {stats['skipped']}")
-    logging.info(f"Weeks with no time data: {stats['no_data']}")
-    logging.info(f"Weeks with errors: {stats['errors']}")
+        logging.info("Weeks with replaced content: %s", stats['replaced'])
+    logging.info("Weeks skipped (already existed): %s", stats['skipped'])
+    logging.info("Weeks with no time data: %s", stats['no_data'])
+    logging.info("Weeks with errors: %s", stats['errors'])
 
 def main():
     """Main application entry point"""
@@ -853,18 +1091,21 @@ def main():
     parser.add_argument('--verbose', action='store_true', help='Enable verbose logging')
     parser.add_argument('--current', action='store_true', help='Process the current week instead of the last completed week')
     parser.add_argument('--replace', action='store_true', help='Replace existing entries instead of skipping them')
+    parser.add_argument('--no-cache', action='store_true', help='Ignore and do not write the on-disk project cache')
     args = parser.parse_args()
     
     # Load configuration
     config = load_config()
+    if args.no_cache:
+        config['toggl']['cache_dir'] = None
     
     if args.verbose:
-        logging.debug(f"Command line args: {vars(args)}")
-        logging.debug(f"Fill-in mode enabled: {args.fill_all_weeks}")
+        logging.debug("Command line args: %s", vars(args))
+        logging.debug("Fill-in mode enabled: %s", args.fill_all_weeks)
         if args.year:
-            logging.debug(f"Processing year: {args.year}")
+            logging.debug("Processing year: %s", args.year)
         if args.current:
-            logging.debug(f"Processing current week instead of last week")
+            logging.debug("Processing current week instead of last week")
         if args.replace:
             logging.debug("Replace mode enabled: Will overwrite existing entries")
     
@@ -878,7 +1119,7 @@ def main():
     try:
         if args.fill_all_weeks:
             year_msg = f" for {args.year}" if args.year else ""
-            logging.info(f"Fill-in mode activated. Will add reports for all missing weeks{year_msg}.")
+            logging.info("Fill-in mode activated. Will add reports for all missing weeks%s.", year_msg)
             fill_in_missing_weeks(toggl_service, confluence_service, args.year, args.replace)
         else:
             # Use current week or last week based on the flag
@@ -891,9 +1132,8 @@ def main():
         
         logging.info("All operations completed successfully!")
     except Exception as e:
-        logging.error(f"Error: {str(e)}")
+        logging.error("Error: %s", e)
         if config['app']['debug']:
-            import traceback
             traceback.print_exc()
         sys.exit(1)
 
@@ -0,0 +1,19 @@
+import sys
+from pathlib import Path
+from unittest import mock
+
+# Make submit_wars importable however pytest is invoked
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from submit_wars import ApiService
+
+
+def init_without_session(self, base_url, api_token):
+    """Stand-in for ApiService.__init__ that skips creating an HTTP session"""
+    self.base_url = base_url
+    self.api_token = api_token
+
+
+def patch_api_init():
+    """Patcher that swaps ApiService.__init__ for init_without_session"""
+    return mock.patch.object(ApiService, '__init__', init_without_session)
@@ -2,17 +2,40 @@ import unittest
 from unittest import mock
 import json
 from datetime import datetime
-import sys
-import os
+from conftest import patch_api_init
+from submit_wars import ApiService, TogglService, ConfluenceService, process_week, fill_in_missing_weeks
 
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from submit_wars import TogglService, ConfluenceService, process_week
+# Canned API payloads shared by the tests; treat them as read-only
+CONFLUENCE_PAGE = {
+    "body": {"storage": {"value": "<h1>July</h1>"}},
+    "title": "Weekly Reports",
+    "version": {"number": 1}
+}
+TOGGL_RECORDS = [
+    {"project_id": 123, "description": "Task 1"},
+    {"project_id": 456, "description": "Task 2"}
+]
+TOGGL_PROJECTS = [
+    {"id": 123, "name": "Project A"},
+    {"id": 456, "name": "Project B"}
+]
 
 class MockResponse:
-    def __init__(self, json_data, status_code=200):
+    __slots__ = ('json_data', 'status_code', 'headers')
+    
+    def __init__(self, json_data, status_code=200, headers=None):
         self.json_data = json_data
         self.status_code = status_code
-        self.text = json.dumps(json_data)
+        self.headers = headers or {}
+    
+    @property
+    def text(self):
+        # Serialized only when a test reads it
+        return json.dumps(self.json_data)
+    
+    @property
+    def content(self):
+        return self.text.encode()
     
     def json(self):
         return self.json_data
@@ -21,71 +44,161 @@ class MockResponse:
         if self.status_code >= 400:
             raise Exception(f"HTTP Error: {self.status_code}")
 
+# Responses are never modified by the code under test, so one of each is shared
+TOGGL_RECORDS_RESPONSE = MockResponse(TOGGL_RECORDS)
+TOGGL_PROJECTS_RESPONSE = MockResponse(TOGGL_PROJECTS)
+CONFLUENCE_PAGE_RESPONSE = MockResponse(CONFLUENCE_PAGE)
+CONFLUENCE_SAVE_RESPONSE = MockResponse({"version": {"number": 2}})
+
 class TestIntegration(unittest.TestCase):
     """Integration tests using mock API responses"""
     
-    @mock.patch('requests.post')
-    @mock.patch('requests.get')
-    def test_process_week(self, mock_get, mock_post):
-        # Mock API responses
-        mock_get.return_value = MockResponse({
-            "body": {"storage": {"value": "<h1>July</h1>"}},
-            "title": "Weekly Reports",
-            "version": {"number": 1}
+    @classmethod
+    def setUpClass(cls):
+        # Start the patches once for the whole class; they are stopped on cleanup
+        def start(patcher):
+            patched = patcher.start()
+            cls.addClassCleanup(patcher.stop)
+            return patched
+        
+        start(patch_api_init())
+        # Every HTTP call of the services goes through ApiService._request
+        cls.mock_request = start(mock.patch.object(ApiService, '_request'))
+    
+    def setUp(self):
+        self.mock_request.reset_mock(return_value=True, side_effect=True)
+    
+    def test_process_week(self):
+        # Answer each API call from the canned payloads
+        def fake_request(method, url, **kwargs):
+            if url.endswith("/search/time_entries"):
+                return TOGGL_RECORDS_RESPONSE
+            if url.endswith("/projects"):
+                return TOGGL_PROJECTS_RESPONSE
+            if method == 'GET':
+                return CONFLUENCE_PAGE_RESPONSE
+            return CONFLUENCE_SAVE_RESPONSE
+        self.mock_request.side_effect = fake_request
+        
+        toggl_service = TogglService(
+            api_token="fake-token",
+            api_url="https://api.track.toggl.com",
+            workspace_id="12345",
+            reports_api_url="https://api.track.toggl.com/reports"
+        )
+        confluence_service = ConfluenceService(
+            base_url="https://example.org",
+            api_token="fake-token",
+            page_id="12345",
+            username="testuser"
+        )
+        
+        # Test process_week function - using datetime objects instead of strings
+        date_range = {
+            "start_date": datetime(2023, 7, 10),
+            "end_date": datetime(2023, 7, 14)
+        }
+        
+        process_week(toggl_service, confluence_service, date_range)
+        
+        # Toggl is asked for the week's entries, then the page is read and saved once
+        methods = [call.args[0] for call in self.mock_request.call_args_list]
+        self.assertEqual(methods, ['POST', 'GET', 'GET', 'PUT'])
+        
+        search_payload = json.loads(self.mock_request.call_args_list[0].kwargs['data'])
+        self.assertEqual(search_payload, {"start_date": "2023-07-10", "end_date": "2023-07-14"})
+        
+        put_payload = json.loads(self.mock_request.call_args_list[-1].kwargs['data'])
+        self.assertEqual(put_payload['version'], {'number': 2})
+        content = put_payload['body']['storage']['value']
+        self.assertIn("<h2>w/e 14/07</h2>\n<h3>testuser</h3>", content)
+        self.assertIn("<li>Project A", content)
+        self.assertIn("<li>Task 2</li>", content)
+    
+    def test_fill_in_missing_weeks(self):
+        toggl_service = TogglService(
+            api_token="fake-token",
+            api_url="https://api.track.toggl.com",
+            workspace_id="12345"
+        )
+        confluence_service = ConfluenceService(
+            base_url="https://example.org",
+            api_token="fake-token",
+            page_id="12345",
+            username="testuser",
+            display_name="Test User"
+        )
+        
+        toggl_service.fetch_projects = mock.Mock(return_value={123: "Project A"})
+        # Only the last two weeks of the year have time entries
+        toggl_service.fetch_all_weeks = mock.Mock(
+            side_effect=lambda weeks: [
+                [{"project_id": 123, "description": f"Task {week['end_date'].day}"}]
+                if week['end_date'] >= datetime(2023, 12, 22) else []
+                for week in weeks
+            ]
+        )
+        confluence_service.get_page_content = mock.Mock(return_value={
+            'content': "<h1>December</h1>\n<h2>w/e 29/12</h2>\n<h3>Test User</h3>\n<ul></ul>\n",
+            'title': "WARs",
+            'version': 7
+        })
+        confluence_service.save_page = mock.Mock()
+        
+        fill_in_missing_weeks(toggl_service, confluence_service, year=2023)
+        
+        # The existing week is skipped and never fetched
+        fetched_weeks = toggl_service.fetch_all_weeks.call_args[0][0]
+        self.assertEqual(len(fetched_weeks), 51)
+        self.assertNotIn(datetime(2023, 12, 29), [week['end_date'] for week in fetched_weeks])
+        
+        # The one new week with data is saved in a single update
+        confluence_service.get_page_content.assert_called_once()
+        confluence_service.save_page.assert_called_once()
+        title, content, version = confluence_service.save_page.call_args[0]
+        self.assertEqual((title, version), ("WARs", 7))
+        self.assertIn("<h2>w/e 22/12</h2>", content)
+        self.assertIn("<li>Task 22</li>", content)
+        self.assertNotIn("Task 29", content)
+    
+    def test_fill_in_missing_weeks_nothing_pending(self):
+        toggl_service = TogglService(
+            api_token="fake-token",
+            api_url="https://api.track.toggl.com",
+            workspace_id="12345"
+        )
+        confluence_service = ConfluenceService(
+            base_url="https://example.org",
+            api_token="fake-token",
+            page_id="12345",
+            username="testuser",
+            display_name="Test User"
+        )
+        
+        toggl_service.fetch_projects = mock.Mock()
+        toggl_service.fetch_all_weeks = mock.Mock()
+        confluence_service.save_page = mock.Mock()
+        
+        # Every week of the (mocked) year already has a report
+        weeks = [{
+            "start_date": datetime(2023, 7, 10),
+            "end_date": datetime(2023, 7, 14),
+            "month": "July",
+            "week_end_date": "14/07"
+        }]
+        confluence_service.get_page_content = mock.Mock(return_value={
+            'content': "<h1>July</h1>\n<h2>w/e 14/07</h2>\n<h3>Test User</h3>\n<ul></ul>\n",
+            'title': "WARs",
+            'version': 7
         })
         
-        mock_post.return_value = MockResponse([
-            {"project_id": 123, "description": "Task 1"},
-            {"project_id": 456, "description": "Task 2"}
-        ])
+        with mock.patch('submit_wars.DateUtils.get_all_weeks_in_year', return_value=weeks):
+            fill_in_missing_weeks(toggl_service, confluence_service)
         
-        # Create services with mocked API calls
-        with mock.patch('submit_wars.ApiService.__init__', return_value=None):
-            toggl_service = TogglService(
-                api_token="fake-token",
-                api_url="https://api.track.toggl.com",
-                workspace_id="12345",
-                reports_api_url="https://api.track.toggl.com/reports"
-            )
-            
-            # Mock fetch_projects to return test data
-            toggl_service.fetch_projects = mock.MagicMock(
-                return_value={123: "Project A", 456: "Project B"}
-            )
-            
-            # Mock the fetch_time_records method
-            toggl_service.fetch_time_records = mock.MagicMock(
-                return_value=[
-                    {"project_id": 123, "description": "Task 1"},
-                    {"project_id": 456, "description": "Task 2"}
-                ]
-            )
-            
-            confluence_service = ConfluenceService(
-                base_url="https://example.org",
-                api_token="fake-token",
-                page_id="12345",
-                username="testuser"
-            )
-            
-            # Mock the post_report method
-            confluence_service.post_report = mock.MagicMock()
-            
-            # Test process_week function - using datetime objects instead of strings
-            date_range = {
-                "start_date": datetime(2023, 7, 10),
-                "end_date": datetime(2023, 7, 14)
-            }
-            
-            process_week(toggl_service, confluence_service, date_range)
-            
-            # Assert that post_report was called
-            confluence_service.post_report.assert_called_once()
-            
-            # Assert that fetch_time_records was called with correct dates
-            toggl_service.fetch_time_records.assert_called_once_with(
-                date_range["start_date"], date_range["end_date"]
-            )
+        # No Toggl requests and no page update are needed
+        toggl_service.fetch_projects.assert_not_called()
+        toggl_service.fetch_all_weeks.assert_not_called()
+        confluence_service.save_page.assert_not_called()
 
 
 if __name__ == '__main__':
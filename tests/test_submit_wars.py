@@ -1,12 +1,27 @@
 import unittest
 from unittest import mock
+import json
+import os
+import tempfile
+import time
 from datetime import datetime, timedelta
 import re
+from pathlib import Path
+from conftest import patch_api_init
 from submit_wars import (
     DateUtils, ConfluenceService, TogglService, 
-    format_time_records, ApiService
+    format_time_records
 )
 
+class FrozenDatetime(datetime):
+    """datetime whose now() returns a fixed moment, for patching submit_wars.datetime"""
+    frozen_now = None
+    
+    @classmethod
+    def now(cls, tz=None):
+        return cls.frozen_now
+
+
 class TestDateUtils(unittest.TestCase):
     """Test cases for DateUtils class"""
     
@@ -14,17 +29,27 @@ class TestDateUtils(unittest.TestCase):
         # Test from a known Monday (2023-07-10)
         monday = datetime(2023, 7, 10)
         friday = DateUtils.get_last_friday(monday)
-        self.assertEqual(friday.strftime('%Y-%m-%d'), '2023-07-07')
+        self.assertEqual(friday, datetime(2023, 7, 7))
         
         # Test from a Friday
         friday_date = datetime(2023, 7, 7)
         prev_friday = DateUtils.get_last_friday(friday_date)
-        self.assertEqual(prev_friday.strftime('%Y-%m-%d'), '2023-06-30')
+        self.assertEqual(prev_friday, datetime(2023, 6, 30))
         
         # Test from weekend
         sunday = datetime(2023, 7, 9)
         last_friday = DateUtils.get_last_friday(sunday)
-        self.assertEqual(last_friday.strftime('%Y-%m-%d'), '2023-07-07')
+        self.assertEqual(last_friday, datetime(2023, 7, 7))
+    
+    def test_get_last_friday_every_day(self):
+        # Every day over two years maps to the Friday 1-7 days before it
+        start = datetime(2023, 1, 1, 15, 30)
+        for offset in range(731):
+            day = start + timedelta(days=offset)
+            friday = DateUtils.get_last_friday(day)
+            self.assertEqual(friday.weekday(), 4, day)
+            self.assertIn((day - friday).days, range(1, 8), day)
+            self.assertEqual(friday.time(), day.time(), day)
     
     def test_get_last_week_dates(self):
         with mock.patch('submit_wars.DateUtils.get_last_friday') as mock_get_last_friday:
@@ -35,104 +60,179 @@ class TestDateUtils(unittest.TestCase):
             date_range = DateUtils.get_last_week_dates()
             
             # Verify results
-            self.assertEqual(date_range['start_date'].strftime('%Y-%m-%d'), '2023-07-03')
-            self.assertEqual(date_range['end_date'].strftime('%Y-%m-%d'), '2023-07-07')
+            self.assertEqual(date_range['start_date'], datetime(2023, 7, 3))
+            self.assertEqual(date_range['end_date'], datetime(2023, 7, 7, 23, 59, 59, 999999))
+    
+    def test_get_all_weeks_in_year(self):
+        weeks = DateUtils.get_all_weeks_in_year(2023)
+        
+        # Past years run from the first to the last Friday of the year
+        self.assertEqual(len(weeks), 52)
+        self.assertEqual(weeks[0]['start_date'], datetime(2023, 1, 2))
+        self.assertEqual(weeks[0]['end_date'], datetime(2023, 1, 6))
+        self.assertEqual(weeks[-1]['start_date'], datetime(2023, 12, 25))
+        self.assertEqual(weeks[-1]['end_date'], datetime(2023, 12, 29))
+        self.assertEqual(weeks[-1]['month'], "December")
+        self.assertEqual(weeks[0]['week_end_date'], "06/01")
     
     def test_get_current_week_dates(self):
-        with mock.patch('submit_wars.datetime') as mock_datetime:
+        with mock.patch('submit_wars.datetime', FrozenDatetime):
             # Mock today as Wednesday (2023-07-12)
-            mock_today = datetime(2023, 7, 12)
-            mock_datetime.now.return_value = mock_today
+            FrozenDatetime.frozen_now = datetime(2023, 7, 12)
             
             # Test function
             date_range = DateUtils.get_current_week_dates()
             
             # Should return Monday to Friday of current week
-            self.assertEqual(date_range['start_date'].strftime('%Y-%m-%d'), '2023-07-10') 
-            self.assertEqual(date_range['end_date'].strftime('%Y-%m-%d'), '2023-07-14')
+            self.assertEqual(date_range['start_date'], datetime(2023, 7, 10))
+            self.assertEqual(date_range['end_date'], datetime(2023, 7, 14, 23, 59, 59, 999999))
             
             # Now test from a Friday
-            mock_today = datetime(2023, 7, 14)
-            mock_datetime.now.return_value = mock_today
+            FrozenDatetime.frozen_now = datetime(2023, 7, 14)
             
             date_range = DateUtils.get_current_week_dates()
-            self.assertEqual(date_range['start_date'].strftime('%Y-%m-%d'), '2023-07-10')
-            self.assertEqual(date_range['end_date'].strftime('%Y-%m-%d'), '2023-07-14')
+            self.assertEqual(date_range['start_date'], datetime(2023, 7, 10))
+            self.assertEqual(date_range['end_date'], datetime(2023, 7, 14, 23, 59, 59, 999999))
             
             # Test from a weekend (should give same week)
-            mock_today = datetime(2023, 7, 15)  # Saturday
-            mock_datetime.now.return_value = mock_today
+            FrozenDatetime.frozen_now = datetime(2023, 7, 15)  # Saturday
             
             date_range = DateUtils.get_current_week_dates()
-            self.assertEqual(date_range['start_date'].strftime('%Y-%m-%d'), '2023-07-10')
-            self.assertEqual(date_range['end_date'].strftime('%Y-%m-%d'), '2023-07-15')
+            self.assertEqual(date_range['start_date'], datetime(2023, 7, 10))
+            self.assertEqual(date_range['end_date'], datetime(2023, 7, 15, 23, 59, 59, 999999))
 
 
-class TestConfluenceService(unittest.TestCase):
-    """Test cases for ConfluenceService class"""
+class TestTogglService(unittest.TestCase):
+    """Test cases for TogglService class"""
     
-    def setUp(self):
-        # Create a mock API service
-        with mock.patch('submit_wars.ApiService.__init__', return_value=None):
-            self.confluence = ConfluenceService(
-                base_url="https://example.org",
-                api_token="fake-token",
-                page_id="12345",
-                username="testuser",
-                display_name="Test User"
-            )
+    @classmethod
+    def setUpClass(cls):
+        # Skip the real API setup once for the whole class instead of per test
+        patcher = patch_api_init()
+        patcher.start()
+        cls.addClassCleanup(patcher.stop)
     
-    def test_determine_status_message(self):
-        # Test various combinations of parameters
-        status = self.confluence._determine_status_message(
-            month="July", 
-            week_end_date="14/07", 
-            user_exists=True,
-            week_exists=True, 
-            month_exists=True, 
-            replace=True
+    def setUp(self):
+        self.toggl = TogglService(
+            api_token="fake-token",
+            api_url="https://api.track.toggl.com",
+            workspace_id="12345"
         )
-        self.assertEqual(status, "Replaced existing report for week ending 14/07.")
+    
+    def test_fetch_all_weeks(self):
+        weeks = [
+            {'start_date': datetime(2023, 7, 3), 'end_date': datetime(2023, 7, 7)},
+            {'start_date': datetime(2023, 7, 10), 'end_date': datetime(2023, 7, 14)},
+            {'start_date': datetime(2023, 7, 17), 'end_date': datetime(2023, 7, 21)},
+        ]
+        record_a = {"description": "A", "time_entries": [
+            {"start": "2023-07-03T09:00:00+02:00"}, {"start": "2023-07-19T09:00:00+02:00"}
+        ]}
+        record_b = {"description": "B", "time_entries": [
+            {"start": "2023-07-05T09:00:00+02:00"}, {"start": "2023-07-15T09:00:00+02:00"}
+        ]}
+        self.toggl.fetch_time_records = mock.Mock(return_value=[record_a, record_b])
         
-        status = self.confluence._determine_status_message(
-            month="July", 
-            week_end_date="14/07", 
-            user_exists=True,
-            week_exists=True, 
-            month_exists=True, 
-            replace=False
-        )
-        self.assertEqual(status, "Report already exists for week ending 14/07.")
+        results = self.toggl.fetch_all_weeks(weeks)
         
-        status = self.confluence._determine_status_message(
-            month="July", 
-            week_end_date="14/07", 
-            user_exists=False,
-            week_exists=True, 
-            month_exists=True, 
-            replace=False
-        )
-        self.assertEqual(status, "Added report to existing week ending 14/07.")
-        
-        status = self.confluence._determine_status_message(
-            month="July", 
-            week_end_date="14/07", 
-            user_exists=False,
-            week_exists=False, 
-            month_exists=True, 
-            replace=False
+        # One request covers all weeks; records land in every week they have entries in
+        self.toggl.fetch_time_records.assert_called_once_with(
+            datetime(2023, 7, 3), datetime(2023, 7, 21), grouped=True
         )
-        self.assertEqual(status, "Added new week ending 14/07.")
-        
-        status = self.confluence._determine_status_message(
-            month="July", 
-            week_end_date="14/07", 
-            user_exists=False,
-            week_exists=False, 
-            month_exists=False, 
-            replace=False
+        self.assertEqual(results, [[record_a, record_b], [], [record_a]])
+        
+        # A failed request is reported for every week
+        self.toggl.fetch_time_records.side_effect = Exception("boom")
+        results = self.toggl.fetch_all_weeks(weeks)
+        self.assertEqual(len(results), 3)
+        self.assertTrue(all(isinstance(result, Exception) for result in results))
+        self.assertEqual(self.toggl.fetch_all_weeks([]), [])
+    
+    def test_fetch_time_records_pagination(self):
+        self.toggl.reports_api_url = "https://api.track.toggl.com/reports"
+        first_page = mock.Mock(content=b'[{"description": "A"}]', headers={
+            'X-Next-ID': '42', 'X-Next-Row-Number': '51'
+        })
+        last_page = mock.Mock(content=b'[{"description": "B"}]', headers={})
+        self.toggl._request = mock.Mock(side_effect=[first_page, last_page])
+        
+        records = self.toggl.fetch_time_records(datetime(2023, 7, 3), datetime(2023, 7, 7))
+        
+        self.assertEqual(records, [{"description": "A"}, {"description": "B"}])
+        second_payload = json.loads(self.toggl._request.call_args_list[1][1]['data'])
+        self.assertEqual(second_payload['first_row_number'], 51)
+        self.assertEqual(second_payload['first_id'], 42)
+
+    
+    def test_fetch_projects_cache(self):
+        self.toggl.get = mock.Mock(return_value=[{"id": 1, "name": "Project A"}])
+        
+        self.assertEqual(self.toggl.fetch_projects(), {1: "Project A"})
+        self.assertEqual(self.toggl.fetch_projects(), {1: "Project A"})
+        self.toggl.get.assert_called_once()
+        
+        self.toggl.fetch_projects(force_refresh=True)
+        self.assertEqual(self.toggl.get.call_count, 2)
+        
+        # A project missing from the cached map triggers a refresh
+        self.toggl.fetch_projects(project_ids={1})
+        self.assertEqual(self.toggl.get.call_count, 2)
+        self.toggl.fetch_projects(project_ids={1, 2})
+        self.assertEqual(self.toggl.get.call_count, 3)
+    
+    def test_fetch_projects_disk_cache(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            self.toggl.cache_dir = Path(cache_dir)
+            self.toggl.get = mock.Mock(return_value=[{"id": 1, "name": "Project A"}])
+            self.assertEqual(self.toggl.fetch_projects(), {1: "Project A"})
+            
+            # A new run reads the map from disk instead of the API
+            self.toggl._project_map_cache = None
+            self.assertEqual(self.toggl.fetch_projects(), {1: "Project A"})
+            self.toggl.get.assert_called_once()
+            
+            # Stale cache files are ignored
+            self.toggl._project_map_cache = None
+            cache_file = Path(cache_dir) / "projects_12345.json"
+            stale_time = time.time() - TogglService.PROJECT_CACHE_TTL - 60
+            os.utime(cache_file, (stale_time, stale_time))
+            self.toggl.fetch_projects()
+            self.assertEqual(self.toggl.get.call_count, 2)
+
+
+class TestConfluenceService(unittest.TestCase):
+    """Test cases for ConfluenceService class"""
+    
+    @classmethod
+    def setUpClass(cls):
+        # Skip the real API setup once for the whole class instead of per test
+        patcher = patch_api_init()
+        patcher.start()
+        cls.addClassCleanup(patcher.stop)
+    
+    def setUp(self):
+        # A fresh service per test, so state like date_format never leaks
+        self.confluence = ConfluenceService(
+            base_url="https://example.org",
+            api_token="fake-token",
+            page_id="12345",
+            username="testuser",
+            display_name="Test User"
         )
-        self.assertEqual(status, "Added new month 'July'.")
+    
+    def test_determine_status_message(self):
+        # (user_exists, week_exists, month_exists, replace) -> expected status
+        cases = [
+            ((True, True, True, True), "Replaced existing report for week ending 14/07."),
+            ((True, True, True, False), "Report already exists for week ending 14/07."),
+            ((False, True, True, False), "Added report to existing week ending 14/07."),
+            ((False, False, True, False), "Added new week ending 14/07."),
+            ((False, False, False, False), "Added new month 'July'."),
+        ]
+        for flags, expected in cases:
+            with self.subTest(flags=flags):
+                status = self.confluence._determine_status_message("July", "14/07", *flags)
+                self.assertEqual(status, expected)
     
     def test_detect_date_format(self):
         # Test with unpadded dates
@@ -146,12 +246,186 @@ class TestConfluenceService(unittest.TestCase):
         self.confluence._detect_date_format(content)
         self.assertEqual(self.confluence.date_format, "padded")
         
+        # Test with a single-digit month only
+        self.confluence.date_format = None
+        content = "<h2>w/e 14/7</h2><h2>w/e 21/07 extra</h2>"
+        self.confluence._detect_date_format(content)
+        self.assertEqual(self.confluence.date_format, "unpadded")
+        
         # Test with no dates (should default to padded)
         self.confluence.date_format = None
         content = "<h1>July</h1><p>Some content</p>"
         self.confluence._detect_date_format(content)
         self.assertEqual(self.confluence.date_format, "padded")
 
+    
+    def test_prepare_updated_content(self):
+        content = "<h1>July</h1>\n<h2>w/e 14/07</h2>\n<h3>Test User</h3>\n<p>old</p>\n"
+        week_info = {'month': 'July', 'week_end_date': '14/07'}
+        
+        updated, status = self.confluence.prepare_updated_content(content, "<p>new</p>", week_info)
+        self.assertEqual(updated, content)
+        self.assertEqual(status, "Report already exists for week ending 14/07.")
+        
+        updated, status = self.confluence.prepare_updated_content(content, "<p>new</p>", week_info, replace=True)
+        self.assertIn("<p>new</p>", updated)
+        self.assertNotIn("<p>old</p>", updated)
+        self.assertEqual(status, "Replaced existing report for week ending 14/07.")
+        
+        week_info = {'month': 'July', 'week_end_date': '21/07'}
+        updated, status = self.confluence.prepare_updated_content(content, "<p>new</p>", week_info)
+        self.assertLess(updated.index("w/e 21/07"), updated.index("w/e 14/07"))
+        self.assertEqual(status, "Added new week ending 21/07.")
+    
+    def test_has_week_for_user(self):
+        content = "<h1>July</h1><h2>w/e 14/07</h2><h3>Test User</h3><ul></ul><h2>w/e 07/07</h2><h3>Someone</h3>"
+        self.assertTrue(self.confluence.has_week_for_user(content, "14/07"))
+        self.assertFalse(self.confluence.has_week_for_user(content, "07/07"))
+        self.assertFalse(self.confluence.has_week_for_user(content, "21/07"))
+        
+        # Regex metacharacters in names are matched literally
+        self.confluence.display_name = "T. User (PhD)"
+        self.assertFalse(self.confluence.has_week_for_user(content, "14/07"))
+        content = content.replace("Test User", "T. User (PhD)")
+        self.assertTrue(self.confluence.has_week_for_user(content, "14/07"))
+        
+        # Names are matched in their HTML-escaped form
+        self.confluence.display_name = "R&D <Team>"
+        content = "<h1>July</h1><h2>w/e 14/07</h2><h3>R&amp;D &lt;Team&gt;</h3><ul></ul>"
+        self.assertTrue(self.confluence.has_week_for_user(content, "14/07"))
+        self.assertEqual(self.confluence.extract_existing_week_dates(content), {"14/07"})
+        
+        # Unpadded headings are found from a padded date
+        self.confluence.display_name = "T. User (PhD)"
+        content = "<h1>July</h1><h2>w/e 7/7</h2><h3>T. User (PhD)</h3>"
+        self.assertTrue(self.confluence.has_week_for_user(content, "07/07"))
+    
+    def test_extract_existing_week_dates(self):
+        content = (
+            "<h1>July</h1><h2>w/e 14/07</h2><h3>Someone</h3><h3>Test User</h3>"
+            "<h2>w/e 7/7</h2><h3>Test User</h3>"
+            "<h1>June</h1><h2>w/e 30/06</h2><h3>Someone</h3>"
+        )
+        self.assertEqual(self.confluence.extract_existing_week_dates(content), {"14/07", "07/07"})
+        
+        # A user heading under a non-week <h2> does not belong to the week before it
+        content = "<h1>July</h1><h2>w/e 14/07</h2><h3>Someone</h3><h2>Team notes</h2><h3>Test User</h3>"
+        self.assertEqual(self.confluence.extract_existing_week_dates(content), set())
+        self.assertFalse(self.confluence.has_week_for_user(content, "14/07"))
+    
+    def test_check_content_exists_either_format(self):
+        content = "<h1>July</h1><h2>w/e 7/7</h2><h3>Test User</h3><ul></ul>"
+        
+        # A padded lookup still finds an unpadded heading
+        week_match, user_match = self.confluence._check_content_exists(content, 7, 7)
+        self.assertIsNotNone(week_match)
+        self.assertIsNotNone(user_match)
+    
+    def test_replace_user_content(self):
+        content = (
+            "<h1>July</h1>\n"
+            "<h2>w/e 14/07</h2>\n<h3>Test User</h3>\n<p>old</p>\n<h3>Someone</h3>\n<p>theirs</p>\n"
+            "<h2>w/e 07/07</h2>\n<h3>Test User</h3>\n<p>old</p>\n"
+        )
+        _, user_match = self.confluence._check_content_exists(content, 14, 7)
+        result = self.confluence._replace_user_content(content, user_match, "<p>new</p>\n")
+        
+        # Only the requested week changes; other users and weeks stay intact
+        self.assertEqual(result, content.replace("<p>old</p>", "<p>new</p>", 1))
+    
+    def test_add_to_existing_week(self):
+        content = "<h1>July</h1>\n<h2>w/e 14/07</h2>\n<h3>Someone</h3>\n<p>theirs</p>\n"
+        week_match, user_match = self.confluence._check_content_exists(content, 14, 7)
+        self.assertIsNone(user_match)
+        result = self.confluence._add_to_existing_week(content, week_match, "<p>mine</p>")
+        self.assertEqual(
+            result,
+            "<h1>July</h1>\n<h2>w/e 14/07</h2>\n<h3>Test User</h3>\n<p>mine</p>\n<h3>Someone</h3>\n<p>theirs</p>\n"
+        )
+    
+    def test_add_new_week(self):
+        content = "<h1>July</h1>\n<h2>w/e 21/07</h2>\n<p>a</p>\n<h2>w/e 07/07</h2>\n<p>b</p>\n"
+        result = self.confluence._add_new_week(content, "14/07", "<p>new</p>", (14, 7))
+        self.assertLess(result.index("w/e 21/07"), result.index("w/e 14/07"))
+        self.assertLess(result.index("w/e 14/07"), result.index("w/e 07/07"))
+        
+        # Newest week goes above all existing weeks
+        result = self.confluence._add_new_week(content, "28/07", "<p>new</p>", (28, 7))
+        self.assertLess(result.index("w/e 28/07"), result.index("w/e 21/07"))
+        
+        # Unpadded headings are ordered too
+        content = "<h1>July</h1>\n<h2>w/e 21/7</h2>\n<p>a</p>\n<h2>w/e 7/7</h2>\n<p>b</p>\n"
+        result = self.confluence._add_new_week(content, "14/7", "<p>new</p>", (14, 7))
+        self.assertLess(result.index("w/e 21/7"), result.index("w/e 14/7"))
+        self.assertLess(result.index("w/e 14/7"), result.index("w/e 7/7"))
+    
+    def test_extract_month_sections(self):
+        content = (
+            "<h1>July</h1>\n<h2>w/e 14/07</h2>\n"
+            "<h1>Notes</h1>\n<p>not a month</p>\n"
+            "<h1>June</h1>\n<h2>w/e 30/06</h2>\n"
+        )
+        sections = self.confluence.extract_month_sections(content)
+        self.assertEqual(sections, {
+            "July": "<h1>July</h1>\n<h2>w/e 14/07</h2>\n",
+            "June": "<h1>June</h1>\n<h2>w/e 30/06</h2>\n",
+        })
+    
+    def test_post_reports_batch(self):
+        self.confluence.get_page_content = mock.Mock(return_value={
+            'content': "<h1>July</h1>\n<h2>w/e 07/07</h2>\n<h3>Other User</h3>\n<ul></ul>",
+            'title': "WARs",
+            'version': 3
+        })
+        self.confluence.save_page = mock.Mock()
+        
+        reports = [
+            {'month': "July", 'week_end_date': "14/07", 'content': "<p>week 2</p>"},
+            {'month': "July", 'week_end_date': "07/07", 'content': "<p>week 1</p>"},
+        ]
+        self.assertTrue(self.confluence.post_reports_batch(reports))
+        
+        # The page is fetched and saved exactly once for the whole batch
+        self.confluence.get_page_content.assert_called_once()
+        self.confluence.save_page.assert_called_once()
+        title, content, version = self.confluence.save_page.call_args[0]
+        self.assertEqual((title, version), ("WARs", 3))
+        self.assertIn("<p>week 1</p>", content)
+        self.assertLess(content.index("w/e 14/07"), content.index("w/e 07/07"))
+        
+        # Nothing to add means nothing to save
+        self.confluence.save_page.reset_mock()
+        self.assertFalse(self.confluence.post_reports_batch([]))
+        self.confluence.save_page.assert_not_called()
+        
+        # Weeks that already exist leave the page untouched, even with months out of order
+        page_data = {
+            'content': "<h1>June</h1>\n<h2>w/e 30/06</h2>\n<h1>July</h1>\n<h2>w/e 07/07</h2>\n<h3>Test User</h3>\n",
+            'title': "WARs",
+            'version': 4
+        }
+        reports = [{'month': "July", 'week_end_date': "07/07", 'content': "<p>week 1</p>"}]
+        self.assertFalse(self.confluence.post_reports_batch(reports, page_data=page_data))
+        self.confluence.save_page.assert_not_called()
+
+    
+    def test_get_page_content_cache(self):
+        self.confluence.get = mock.Mock(return_value={
+            "body": {"storage": {"value": "<h1>July</h1>"}},
+            "title": "WARs",
+            "version": {"number": 5}
+        })
+        
+        first = self.confluence.get_page_content()
+        second = self.confluence.get_page_content()
+        self.assertEqual(first, {'content': "<h1>July</h1>", 'title': "WARs", 'version': 5})
+        self.assertIs(first, second)
+        self.confluence.get.assert_called_once()
+        
+        self.confluence.invalidate_page_cache()
+        self.confluence.get_page_content()
+        self.assertEqual(self.confluence.get.call_count, 2)
+
 
 class TestFormatting(unittest.TestCase):
     """Test cases for formatting functions"""
@@ -172,20 +446,22 @@ class TestFormatting(unittest.TestCase):
         
         result = format_time_records(time_records, project_map)
         
-        # Check that all projects appear in the output
-        self.assertIn("Project A", result)
-        self.assertIn("Project B", result)
-        self.assertIn("Other", result)
-        
-        # Check that all tasks appear in the output
-        self.assertIn("Task 1", result)
-        self.assertIn("Task 2", result)
-        self.assertIn("Another task", result)
-        self.assertIn("No project task", result)
+        # Projects and their tasks are listed in sorted order
+        self.assertEqual(result.split("\n"), [
+            "<ul>",
+            "<li>Other", "<ul>", "<li>No project task</li>", "</ul>", "</li>",
+            "<li>Project A", "<ul>", "<li>Task 1</li>", "<li>Task 2</li>", "</ul>", "</li>",
+            "<li>Project B", "<ul>", "<li>Another task</li>", "</ul>", "</li>",
+            "</ul>",
+        ])
         
-        # Verify HTML structure
-        self.assertTrue(result.startswith("<ul>"))
-        self.assertTrue(result.endswith("</ul>"))
+        # Duplicate descriptions are listed once and HTML is escaped
+        result = format_time_records([
+            {"project_id": 123, "description": "Fix <b> tag"},
+            {"project_id": 123, "description": "Fix <b> tag "},
+            {"project_id": 123, "description": None},
+        ], project_map)
+        self.assertEqual(result.count("<li>Fix &lt;b&gt; tag</li>"), 1)
 
 
 if __name__ == '__main__':